@@ -0,0 +1,59 @@
+"""Throughput of the learned evaluation function.
+
+Scores the same random positions with `training.Evaluator` in batches of
+different sizes and one at a time, the way the search calls it, and with
+the hand-written `search.evaluate` for comparison. Needs NumPy. Run from
+the top of the repository::
+
+    python -m benchmarks.evaluation
+
+"""
+
+import argparse
+import random
+import time
+
+from treasurelib.search import evaluate
+from treasurelib.training import FEATURES, Evaluator, encode
+
+from .scaling import random_position
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=20000)
+    parser.add_argument('--size', type=int, default=7)
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=[1, 16, 256, 4096])
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    positions = [random_position(args.size, rng.randrange(30), rng)
+                 for _ in range(args.positions)]
+    evaluator = Evaluator([rng.uniform(-1, 1) for _ in FEATURES])
+
+    started = time.perf_counter()
+    grids, last = encode(positions)
+    report('encode', len(positions), time.perf_counter() - started)
+
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        for i in range(0, len(positions), batch_size):
+            evaluator.evaluate_batch(grids[i:i+batch_size], last[i:i+batch_size])
+        report('batch {0}'.format(batch_size), len(positions),
+               time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for board, player in positions:
+        evaluator(board, player)
+    report('single', len(positions), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for board, player in positions:
+        evaluate(board, player)
+    report('search.evaluate', len(positions), time.perf_counter() - started)
+
+def report(label, count, seconds):
+    print('{0:<16} {1:>12.0f} positions per second'.format(label, count / seconds))
+
+if __name__ == '__main__':
+    main()
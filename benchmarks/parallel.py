@@ -0,0 +1,58 @@
+"""Speedup of the parallel search over a single worker.
+
+Searches a fixed set of positions to a fixed depth with 1, 2, 4, 8 and
+16 worker processes, each time with an empty table, and reports the
+time taken and the speedup over one worker. Run from the top of the
+repository::
+
+    python -m benchmarks.parallel --depth 5
+
+"""
+
+import argparse
+import random
+import time
+
+from treasurelib.model import Board, PLAYERS
+from treasurelib.parallel import ParallelSearcher
+
+from .scaling import random_position
+
+def positions(count):
+    """The starting positions for sizes 5 and 7, then random positions
+    from a fixed seed."""
+    result = [(Board(5), PLAYERS[0]), (Board(7), PLAYERS[0])]
+    rng = random.Random(0)
+    while len(result) < count:
+        result.append(random_position(rng.choice([5, 7]), 10, rng))
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--positions', type=int, default=4)
+    parser.add_argument('--slots', type=int, default=1 << 20)
+    args = parser.parse_args(argv)
+
+    cases = positions(args.positions)
+    baseline = None
+    print('{0:>7} {1:>10} {2:>12} {3:>8}'.format('workers', 'seconds', 'nodes', 'speedup'))
+    for workers in args.workers:
+        with ParallelSearcher(workers, args.slots) as searcher:
+            # Start the workers before the clock does
+            searcher.search(Board(5), PLAYERS[0], depth=1)
+            elapsed = nodes = 0
+            for board, player in cases:
+                searcher.table.clear()
+                started = time.perf_counter()
+                result = searcher.search(board, player, depth=args.depth)
+                elapsed += time.perf_counter() - started
+                nodes += result.nodes
+        if baseline is None:
+            baseline = elapsed
+        print('{0:>7} {1:>10.2f} {2:>12} {3:>7.2f}x'.format(
+            workers, elapsed, nodes, baseline / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""How move generation scales with board size.
+
+For each size, play some random moves to reach a typical position, then
+time `valid_moves_from` on every piece and `valid_moves` for the whole
+board. Run from the top of the repository::
+
+    python -m benchmarks.scaling
+
+"""
+
+import argparse
+import random
+import timeit
+
+from treasurelib.model import Board, MIN_SIZE, LARGE_MAX_SIZE, PLAYERS, issolid
+from treasurelib.search import other
+
+def random_position(size, plies, rng):
+    """Play random moves from the start of a game, stopping early if
+    the next move would win."""
+    board = Board(size, large=True)
+    player = PLAYERS[0]
+    for _ in range(plies):
+        moves = board.valid_moves(player)
+        if not moves:
+            break
+        start, end = rng.choice(moves)
+        probe = board.copy()
+        if probe.move(player, start, end) is not None:
+            break
+        board = probe
+        player = other(player)
+    return board, player
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[MIN_SIZE, 9, 15, 31, LARGE_MAX_SIZE])
+    parser.add_argument('--plies', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    print('{0:>5} {1:>7} {2:>14} {3:>12} {4:>14}'.format(
+        'size', 'pieces', 'per piece (us)', 'per row (ns)', 'all moves (us)'))
+    for size in args.sizes:
+        board, player = random_position(size, args.plies, rng)
+        starts = [(x, y) for y, row in enumerate(board)
+                  for x, piece in enumerate(row) if issolid(piece)]
+
+        def from_each_piece():
+            for start in starts:
+                board.valid_moves_from(player, start)
+
+        number = max(1, 2000 // len(starts))
+        per_piece = min(timeit.repeat(from_each_piece, number=number,
+                                      repeat=args.repeat)) / number / len(starts)
+        all_moves = min(timeit.repeat(lambda: board.valid_moves(player),
+                                      number=number, repeat=args.repeat)) / number
+        print('{0:>5} {1:>7} {2:>14.2f} {3:>12.1f} {4:>14.1f}'.format(
+            size, len(starts), per_piece * 1e6, per_piece / size * 1e9,
+            all_moves * 1e6))
+
+if __name__ == '__main__':
+    main()
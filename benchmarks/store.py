@@ -0,0 +1,62 @@
+"""Write and read throughput of the SQLite position store.
+
+Generates random positions, writes a result for each in batches, then
+reads them all back twice: once cold, and once with every position in
+the cache. Run from the top of the repository::
+
+    python -m benchmarks.store --positions 100000
+
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from treasurelib.model import MIN_SIZE, PLAYERS
+from treasurelib.store import PositionStore
+
+from .scaling import random_position
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=20000)
+    parser.add_argument('--size', type=int, default=MIN_SIZE + 2)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--path', help='database file (default: a temporary file)')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    results = []
+    for _ in range(args.positions):
+        board, player = random_position(args.size, rng.randrange(1, 30), rng)
+        moves = board.valid_moves(player)
+        move = rng.choice(moves) if moves else None
+        results.append((board, player, rng.randrange(-100, 100), move,
+                        rng.randrange(1, 10)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path or os.path.join(directory, 'positions.db')
+
+        with PositionStore(path, batch_size=args.batch_size,
+                           cache_size=len(results)) as store:
+            started = time.perf_counter()
+            store.put_many(results)
+            store.flush()
+            report('write', len(results), time.perf_counter() - started)
+            print('{0} distinct positions'.format(len(store)))
+
+        with PositionStore(path, cache_size=len(results)) as store:
+            for label in ('read (cold)', 'read (cached)'):
+                started = time.perf_counter()
+                for board, player, _, _, _ in results:
+                    store.get(board, player)
+                report(label, len(results), time.perf_counter() - started)
+
+def report(label, count, seconds):
+    print('{0:<14} {1:>8} in {2:6.2f}s: {3:>10.0f} per second'.format(
+        label, count, seconds, count / seconds))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Opening book: precomputed moves for the first few plies.
+
+Every game from `make_board` starts the same way, so the first few
+moves can be searched once, deeply, and written to disk. The book is a
+sorted table of fixed-width records keyed by `canonical_hash`; it is
+memory-mapped and probed by binary search, so opening it costs nothing
+and a lookup touches only a handful of pages.
+
+To build a book::
+
+    python -m treasurelib.book build book.bin --plies 3 --depth 6
+
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+
+from .model import Board, MIN_SIZE, MAX_SIZE, PLAYERS
+from .search import Searcher, other
+from .symmetry import canonical_hash, transform_move
+
+MAGIC = b'TCBOOK1\0'
+
+# Header: magic, number of records, padding
+HEADER = struct.Struct('>8sI4x')
+
+# Record: position hash, start x and y, end x and y, score, depth
+RECORD = struct.Struct('>Q4BhH')
+
+class OpeningBook:
+    """A read-only opening book backed by a memory-mapped file."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Can't map an empty file
+            self.file.close()
+            raise ValueError('not an opening book: {0}'.format(path))
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError('not an opening book: {0}'.format(path))
+        magic, self.count = HEADER.unpack_from(self.map, 0)
+        if (magic != MAGIC or
+                len(self.map) != HEADER.size + self.count * RECORD.size):
+            self.close()
+            raise ValueError('not an opening book: {0}'.format(path))
+
+    def probe(self, board, player):
+        """Look up a position.
+
+        Return ``(move, score, depth)`` with the move in the board's own
+        coordinates, or None if the position isn't in the book.
+
+        """
+        key, transform = canonical_hash(board, player)
+        record = self._find(key)
+        if record is None:
+            return None
+        _, sx, sy, ex, ey, score, depth = record
+        move = transform_move(((sx, sy), (ex, ey)), transform, board.size)
+        return move, score, depth
+
+    def _find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = RECORD.unpack_from(self.map, HEADER.size + mid * RECORD.size)
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def build(sizes, plies, depth, seconds=None, progress=None):
+    """Search every position reachable in fewer than `plies` moves from
+    the start of a game of each size.
+
+    Return a dict mapping position hashes to records. If `progress` is
+    given, it is called with the number of positions searched so far.
+
+    """
+    searcher = Searcher()
+    records = {}
+    for size in sizes:
+        searcher.table.clear()
+        frontier = [(Board(size), PLAYERS[0])]
+        for ply in range(plies):
+            next_frontier = []
+            for board, player in frontier:
+                key, transform = canonical_hash(board, player)
+                if key in records:
+                    continue
+                result = searcher.search(board, player, depth, seconds)
+                if result.move is None:
+                    continue
+                (sx, sy), (ex, ey) = transform_move(result.move, transform, size)
+                records[key] = (key, sx, sy, ex, ey, result.score, result.depth)
+                if progress is not None:
+                    progress(len(records))
+                if ply + 1 < plies:
+                    for start, end in board.valid_moves(player):
+                        child = board.copy()
+                        if child.move(player, start, end) is None:
+                            next_frontier.append((child, other(player)))
+            frontier = next_frontier
+    return records
+
+def write(records, outfile):
+    """Write records, as returned by `build`, to a binary file."""
+    outfile.write(HEADER.pack(MAGIC, len(records)))
+    for key in sorted(records):
+        outfile.write(RECORD.pack(*records[key]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treasure Chest opening book')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    build_parser = commands.add_parser('build', help='build a new book')
+    build_parser.add_argument('output')
+    build_parser.add_argument('--sizes', type=int, nargs='+',
+                              default=list(range(MIN_SIZE, MAX_SIZE + 1, 2)))
+    build_parser.add_argument('--plies', type=int, default=3)
+    build_parser.add_argument('--depth', type=int, default=6)
+    build_parser.add_argument('--seconds', type=float, default=None,
+                              help='time limit per position')
+
+    info_parser = commands.add_parser('info', help='describe a book')
+    info_parser.add_argument('book')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        def progress(count):
+            print('\r{0} positions'.format(count), end='', file=sys.stderr)
+        records = build(args.sizes, args.plies, args.depth, args.seconds,
+                        progress)
+        print(file=sys.stderr)
+        with open(args.output, 'wb') as outfile:
+            write(records, outfile)
+    else:
+        with OpeningBook(args.book) as book:
+            print('{0}: {1} positions'.format(args.book, len(book)))
+            for size in range(MIN_SIZE, MAX_SIZE + 1, 2):
+                hit = book.probe(Board(size), PLAYERS[0])
+                print('Size {0}: {1}'.format(size, hit))
+
+if __name__ == '__main__':
+    main()
@@ -2,33 +2,61 @@
 
 from __future__ import print_function
 
-from itertools import cycle
-import string
+import argparse
+from functools import partial
+import math
+import re
 import sys
 
-from ..model import Board, InputError, PLAYERS, is_valid_size
+from ..book import OpeningBook
+from ..model import (Board, InputError, PLAYERS, column_index, column_name,
+                     is_valid_size)
+from ..search import Searcher, other
 from .messages import ERRORS, MESSAGES
 
-def main():
+# How long the computer thinks when asked for a hint
+HINT_SECONDS = 2.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play Treasure Chest')
+    parser.add_argument('--book', help='opening book to use for hints')
+    parser.add_argument('--large', action='store_true',
+                        help='allow boards bigger than the usual maximum')
+    args = parser.parse_args(argv)
+
+    book = None if args.book is None else OpeningBook(args.book)
     try:
-        play()
+        play(book=book, large=args.large)
     except KeyboardInterrupt:
         print('\nReceived terminate signal; quitting', file=sys.stderr)
+    finally:
+        if book is not None:
+            book.close()
 
-def play(board_cfg=None):
+def play(board_cfg=None, book=None, large=False):
     """Play a game of Treasure Chest on the command line, optionally
-    with an initial board state."""
+    with an initial board state. If `large` is true, the size can go
+    up to LARGE_MAX_SIZE.
+
+    Besides moves, the players can type ``hint``, ``analyse <seconds>``
+    or ``undo``. Pressing Ctrl-C during analysis stops it early.
+
+    """
 
     # Initialize the board
     if board_cfg is None:
-        size = read_with(parse_size, 'prompt_size')
-        board = Board(size)
+        size = read_with(partial(parse_size, large=large), 'prompt_size')
+        board = Board(size, large)
     else:
         board = Board(board_cfg)
 
+    searcher = Searcher(book=book)
+    history = []
+
     # Play the game
     winner = None
-    for player in cycle(PLAYERS):
+    player = PLAYERS[0]
+    while True:
         # Word of God dictates the board shall henceforth be surrounded
         # by blank lines
         print()
@@ -41,13 +69,49 @@ def play(board_cfg=None):
 
         # Read the next move and execute it in one go
         def parse_and_move(s):
+            command = parse_command(s)
+            if command is not None:
+                return command
             start, end = parse_move(s)
-            return board.move(player, start, end)
-        winner = read_with(parse_and_move, 'prompt_move', player)
+            before = board.copy()
+            result = board.move(player, start, end)
+            history.append(before)
+            return 'move', result
+
+        while True:
+            command, arg = read_with(parse_and_move, 'prompt_move', player)
+            if command == 'move':
+                winner = arg
+                player = other(player)
+                break
+            elif command == 'undo':
+                if history:
+                    board = history.pop()
+                    player = other(player)
+                    break
+                print(MESSAGES['no_undo'])
+            else:
+                analyse(searcher, board, player, arg)
 
     # Burma Shave
     print(MESSAGES['win'].format(winner))
 
+def analyse(searcher, board, player, seconds):
+    """Search the position for at most the given number of seconds, and
+    print the best move found."""
+    # Search a copy, in case Ctrl-C lands while a move is half-made
+    result = searcher.search(board.copy(), player, seconds=seconds,
+                             interruptible=True)
+    if searcher.interrupted:
+        print(MESSAGES['interrupted'])
+    if result.move is None:
+        print(MESSAGES['no_analysis'])
+        return
+    rate = result.nodes / result.seconds if result.seconds > 0 else 0
+    print(MESSAGES['analysis'].format(
+        format_move(result.move), result.score, result.depth,
+        result.nodes, result.seconds, rate))
+
 def read_with(reader, key, *args):
     """Prompt the user for input, then pass the resulting string to the
     reader function. If it raises an InputError, display the error and
@@ -59,21 +123,47 @@ def read_with(reader, key, *args):
         except InputError as ex:
             print(ERRORS[ex.key])
 
-def parse_size(s):
+def parse_size(s, large=False):
+    error = 'large_size' if large else 'size'
     try:
         size = int(s)
     except ValueError:
-        raise InputError('size')
+        raise InputError(error)
 
-    if is_valid_size(size):
+    if is_valid_size(size, large):
         return size
     else:
-        raise InputError('size')
+        raise InputError(error)
+
+def parse_command(s):
+    """Parse a command typed in place of a move. Return a pair
+    ``(command, argument)``, or None if the input isn't a command."""
+    words = s.split()
+    if not words:
+        return None
+    name = words[0].lower()
+    if name == 'hint' and len(words) == 1:
+        return 'analyse', HINT_SECONDS
+    elif name in ('analyse', 'analyze') and len(words) <= 2:
+        if len(words) == 1:
+            return 'analyse', HINT_SECONDS
+        try:
+            seconds = float(words[1])
+        except ValueError:
+            raise InputError('think_time')
+        if not (math.isfinite(seconds) and seconds > 0):
+            raise InputError('think_time')
+        return 'analyse', seconds
+    elif name == 'undo' and len(words) == 1:
+        return 'undo', None
+    else:
+        return None
 
 def parse_move(s):
     """Parse a move: a string in the form ``A1:Z2`` specifying a start
-    and end position."""
-    if len(s) != 5:
+    and end position. On large boards, positions can take more than one
+    letter or digit, as in ``AB12:AB30``."""
+    if len(s) < 5:
         raise InputError('move_length')
 
     parts = s.split(':')
@@ -82,10 +172,23 @@ def parse_move(s):
 
     return map(parse_position, parts)
 
+POSITION_RE = re.compile(r'([A-Za-z]+)([0-9]+)$')
+
 def parse_position(s):
     """Parse a position: a string in the form ``P9`` that specifies a
     location on the board."""
-    if len(s) != 2 or not s[0].isalpha() or not s[1].isdigit():
+    match = POSITION_RE.match(s)
+    if match is None:
         raise InputError('move_format')
 
-    return string.ascii_uppercase.index(s[0].upper()), int(s[1]) - 1
+    column, row = match.groups()
+    return column_index(column), int(row) - 1
+
+def format_move(move):
+    """Format a (start, end) pair in the form ``A1:Z2``."""
+    return ':'.join(map(format_position, move))
+
+def format_position(pos):
+    """The inverse of `parse_position`."""
+    x, y = pos
+    return '{0}{1}'.format(column_name(x), y + 1)
@@ -1,6 +1,6 @@
 """Messages used by the command line interface"""
 
-from ..model import MIN_SIZE, MAX_SIZE, ERROR_TYPES
+from ..model import MIN_SIZE, MAX_SIZE, LARGE_MAX_SIZE, ERROR_TYPES
 
 # Change this to True if submitting to university
 BORING = False
@@ -9,14 +9,20 @@ MESSAGES = {
     'prompt_size': "Board size: ",
     'prompt_move': "Player {}, enter move: ",
     'win': "Win for player {}!",
+    'analysis': "Best move {} (score {}, depth {}): {} nodes in {:.2f}s, {:.0f} nodes/s",
+    'no_analysis': "No move found in time",
+    'interrupted': "Analysis interrupted",
+    'no_undo': "Nothing to undo",
     }
 
 ERROR_MOVE_SIZE = "Size must be an odd number between {} and {}".format(MIN_SIZE, MAX_SIZE)
+ERROR_LARGE_SIZE = "Size must be an odd number between {} and {}".format(MIN_SIZE, LARGE_MAX_SIZE)
 
 if not BORING:
     # Interesting error messages
     ERRORS = {
         'size': ERROR_MOVE_SIZE,
+        'large_size': ERROR_LARGE_SIZE,
         'move_length': "Input must be in the format A1:B2",
         'move_format': "Input must be in the format A1:B2",
         'off_board': "You try to go off the board, but that just shows how far you've gone off the rails.",
@@ -26,18 +32,21 @@ if not BORING:
         'moving_other_player': "You can't move the other player. Jerk.",
         'already_moved': "You can't move the piece that was moved last.",
         'move_illegal': "You must move the as far as possible horizontally, vertically or diagonally.",
+        'think_time': "Even a computer needs a positive number of seconds to think.",
         }
 
 else:
     # Boring error messages
-    ERROR_MOVE_LENGTH = "Move must be 5 characters"
+    ERROR_MOVE_LENGTH = "Move must be at least 5 characters"
     ERROR_MOVE_PIECE = "Error move piece"
     ERROR_MOVE_POSITION = "Invalid position"
     ERROR_MOVE_FORMAT = "Invalid input format"
     ERROR_MOVE_ILLEGAL = "Illegal move"
+    ERROR_THINK_TIME = "Invalid think time"
 
     ERRORS = {
         'size': ERROR_MOVE_SIZE,
+        'large_size': ERROR_LARGE_SIZE,
         'move_length': ERROR_MOVE_LENGTH,
         'move_format': ERROR_MOVE_FORMAT,
         'off_board': ERROR_MOVE_POSITION,
@@ -47,6 +56,7 @@ else:
         'moving_other_player': ERROR_MOVE_PIECE,
         'already_moved': ERROR_MOVE_PIECE,
         'move_illegal': ERROR_MOVE_ILLEGAL,
+        'think_time': ERROR_THINK_TIME,
         }
 
 assert ERROR_TYPES == set(ERRORS.keys())
@@ -0,0 +1,148 @@
+"""A line-based protocol for running engines as separate programs, and
+an engine that speaks it.
+
+The controller writes commands to the engine's standard input, one per
+line, and the engine answers on its standard output:
+
+``hello``
+    The engine answers ``hello <name>``.
+
+``position <rows> <last> <player>``
+    Set up a position. `rows` are the rows of the board from top to
+    bottom, joined by ``/``, using the same letters as the CLI (for
+    example ``SSXSS/...../..T../...../SSYSS``). `last` is the square the
+    last move ended on, like ``C4``, or ``-`` at the start of a game.
+    `player` is the player to move. There is no answer.
+
+``go <milliseconds>``
+    Think about the position for at most that long, then answer
+    ``move <move>`` with a move in the CLI notation (``C1:C4``), or
+    ``move none`` if there are no legal moves.
+
+``quit``
+    Exit.
+
+Engines don't need to remember anything between positions, so the
+controller is free to reuse one process for many games.
+
+To run the built-in engine::
+
+    python -m treasurelib.engine --name search
+
+"""
+
+import argparse
+import sys
+
+from .book import OpeningBook
+from .cli import format_move, format_position, parse_position
+from .model import Board, InputError, PLAYERS
+from . import search
+from .search import Searcher
+
+# How much of its time the engine spends searching; the rest is left
+# for starting up, talking, and the clock checks inside the search
+THINK_FRACTION = 0.8
+
+# Forget old positions once the transposition table gets this big
+TABLE_LIMIT = 1000000
+
+class ProtocolError(ValueError):
+    """Raised when a line doesn't follow the protocol."""
+
+def format_position_command(board, player):
+    """Return the ``position`` command for a position."""
+    if board.last_move is None:
+        last = '-'
+    else:
+        last = format_position(board.last_move)
+    rows = '/'.join(''.join(row) for row in board)
+    return 'position {0} {1} {2}'.format(rows, last, player)
+
+def parse_position_command(args):
+    """Parse the arguments of a ``position`` command. Return a pair
+    ``(board, player)``."""
+    if len(args) != 3:
+        raise ProtocolError('position takes 3 arguments')
+    rows, last, player = args
+    if player not in PLAYERS:
+        raise ProtocolError('invalid player: {0}'.format(player))
+    board = Board([list(row) for row in rows.split('/')])
+    if any(len(row) != board.size for row in board):
+        raise ProtocolError('board is not square')
+    if last != '-':
+        try:
+            board.last_move = parse_position(last)
+        except InputError:
+            raise ProtocolError('invalid square: {0}'.format(last))
+    return board, player
+
+def parse_go_command(args):
+    """Parse the arguments of a ``go`` command. Return the time to
+    think, in milliseconds."""
+    if len(args) != 1:
+        raise ProtocolError('go takes 1 argument')
+    try:
+        milliseconds = int(args[0])
+    except ValueError:
+        raise ProtocolError('invalid time: {0}'.format(args[0]))
+    if milliseconds < 0:
+        raise ProtocolError('invalid time: {0}'.format(args[0]))
+    return milliseconds
+
+def run(searcher, name, infile=sys.stdin, outfile=sys.stdout):
+    """Answer commands until told to quit, or the input runs out."""
+    def reply(line):
+        print(line, file=outfile)
+        outfile.flush()
+
+    board = player = None
+    for line in infile:
+        words = line.split()
+        if not words:
+            continue
+        command, args = words[0], words[1:]
+        if command == 'hello':
+            reply('hello {0}'.format(name))
+        elif command == 'position':
+            board, player = parse_position_command(args)
+        elif command == 'go':
+            if board is None:
+                raise ProtocolError('go before position')
+            seconds = parse_go_command(args) / 1000 * THINK_FRACTION
+            if len(searcher.table) > TABLE_LIMIT:
+                searcher.table.clear()
+            move = searcher.search(board, player, seconds=seconds).move
+            if move is None:
+                # Out of time before finishing even one ply
+                moves = board.valid_moves(player)
+                move = moves[0] if moves else None
+            reply('move {0}'.format('none' if move is None else format_move(move)))
+        elif command == 'quit':
+            break
+        else:
+            raise ProtocolError('unknown command: {0}'.format(command))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treasure Chest engine')
+    parser.add_argument('--name', default='treasurelib')
+    parser.add_argument('--book', help='opening book to use')
+    parser.add_argument('--weights', help='evaluation weights from training')
+    args = parser.parse_args(argv)
+
+    if args.weights is None:
+        evaluate = search.evaluate
+    else:
+        # Only needed here, so the engine runs without NumPy otherwise
+        from .training import Evaluator
+        evaluate = Evaluator.load(args.weights)
+
+    book = None if args.book is None else OpeningBook(args.book)
+    try:
+        run(Searcher(evaluate, book=book), args.name)
+    finally:
+        if book is not None:
+            book.close()
+
+if __name__ == '__main__':
+    main()
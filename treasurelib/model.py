@@ -2,7 +2,6 @@
 
 from functools import partial
 from io import StringIO
-from itertools import product
 import operator
 import string
 import sys
@@ -19,13 +18,18 @@ def issolid(piece):
 
 MIN_SIZE, MAX_SIZE = 5, 9
 
-def is_valid_size(size):
-    return size % 2 == 1 and MIN_SIZE <= size <= MAX_SIZE
+# Boards bigger than MAX_SIZE are for experiments, and must be asked for
+LARGE_MAX_SIZE = 63
+
+def is_valid_size(size, large=False):
+    max_size = LARGE_MAX_SIZE if large else MAX_SIZE
+    return size % 2 == 1 and MIN_SIZE <= size <= max_size
 
 ERROR_TYPES = frozenset([
     'size', 'move_length', 'move_format', 'off_board',
     'supporter_on_treasure', 'overlap', 'groping_empty_space',
-    'moving_other_player', 'already_moved', 'move_illegal'
+    'moving_other_player', 'already_moved', 'move_illegal',
+    'think_time', 'large_size'
     ])
 
 class InputError(ValueError):
@@ -35,55 +39,29 @@ class InputError(ValueError):
         self.key = key
         super(InputError, self).__init__(key)
 
-class Board:
-    """Represents a game of Treasure Chest."""
+class Rules:
+    """The rules of Treasure Chest, shared by the mutable `Board` and
+    the immutable `position.Position`.
 
-    def __init__(self, board_or_size=5):
-        """Start a game.
+    Subclasses provide `size`, `last_move`, a `get` method, and
+    iteration over the rows of the board.
 
-        If the argument is a nested list, it will be used as the initial
-        game state; if it is an integer, a new board will be created of
-        that size.
+    """
 
-        """
-        try:
-            self.board = list(board_or_size)
-            self.size = len(self.board)
-        except TypeError:
-            self.board = make_board(board_or_size)
-            self.size = board_or_size
-        self.last_move = None
+    __slots__ = ()
 
     def display(self, file=sys.stdout):
         """Write a human-readable representation of the board to the
         screen."""
         output = partial(print, file=file)
-        for y, row in enumerate(self.board, 1):
-            output(y, *row)
-        output(' ', *string.ascii_uppercase[:self.size])
-
-    def move(self, player, start, end):
-        """Move a piece from one point to another.
-
-        If the move ends the game, return the player that won;
-        otherwise, return None.
-
-        """
-        # Check it's okay with the rule lawyers
-        self.check_move(player, start, end)
-
-        # Move the piece, bra
-        src, dest = self.get(start), self.get(end)
-        self.set(start, EMPTY)
-        self.set(end, src)
-        self.last_move = end
-
-        # If a player moves onto the T, they win!
-        if isplayer(src) and dest == T:
-            assert player == src
-            return player
-        else:
-            return None
+        # Pad everything to line up on large boards
+        label_width = len(str(self.size))
+        width = len(column_name(self.size - 1))
+        for y, row in enumerate(self, 1):
+            output(str(y).rjust(label_width),
+                   *(piece.rjust(width) for piece in row))
+        output(' ' * label_width,
+               *(column_name(x).rjust(width) for x in range(self.size)))
 
     def valid_moves_from(self, player, start):
         """Get a list of valid moves a player can make from a certain
@@ -92,42 +70,101 @@ class Board:
         If there are no such moves, return an empty list.
 
         """
-        valid_ends = []
-        for end in product(range(self.size), range(self.size)):
-            try:
-                self.check_move(player, start, end)
-            except InputError:
-                pass
-            else:
-                valid_ends.append(end)
-        return valid_ends
+        # Only the farthest point along each ray can be valid, so check
+        # the start once and project, rather than trying every square
+        if not in_board(start, self.size) or start == self.last_move:
+            return []
+        src = self.get(start)
+        if not issolid(src) or (isplayer(src) and player != src):
+            return []
+        return sorted(self._project_from(start))
+
+    def valid_moves(self, player):
+        """Get a list of every (start, end) move a player can make."""
+        moves = []
+        for y, row in enumerate(self):
+            for x, piece in enumerate(row):
+                start = (x, y)
+                if piece in (S, player) and start != self.last_move:
+                    moves.extend((start, end) for end in self._project_from(start))
+        return moves
 
     def check_move(self, player, start, end):
         """If the move is valid, do nothing; if it is invalid, raise an
         InputError."""
+        error = self.validate(player, start, end)
+        if error is not None:
+            raise InputError(error)
+
+    def validate(self, player, start, end):
+        """Like `check_move`, but return the key of the error instead of
+        raising it, or None if the move is valid.
+
+        Positions can be any pair of integers, such as a list decoded
+        from JSON; anything else is a 'move_format' error.
+
+        """
+        move = normalise_move((start, end))
+        if move is None:
+            return 'move_format'
+        start, end = move
+        error = self._check_pieces(player, start, end)
+        if error is None and end not in self._project_from(start):
+            error = 'move_illegal'
+        return error
+
+    def validate_many(self, player, moves):
+        """Validate a batch of (start, end) moves against the board.
+
+        Return a list holding an error key or None for each move, in the
+        same order. Rays are only projected once per start position, so
+        this is cheaper than calling `validate` for each move. Moves that
+        aren't a pair of positions get 'move_format', as in `validate`.
+
+        """
+        projections = {}
+        errors = []
+        for move in moves:
+            move = normalise_move(move)
+            if move is None:
+                errors.append('move_format')
+                continue
+            start, end = move
+            error = self._check_pieces(player, start, end)
+            if error is None:
+                ends = projections.get(start)
+                if ends is None:
+                    ends = projections[start] = self._project_from(start)
+                if end not in ends:
+                    error = 'move_illegal'
+            errors.append(error)
+        return errors
+
+    def _check_pieces(self, player, start, end):
+        """Check everything about a move except whether the piece can
+        get from start to end. Return an error key, or None."""
         if (not in_board(start, self.size) or
                 not in_board(end, self.size)):
-            raise InputError('off_board')
+            return 'off_board'
 
         src, dest = self.get(start), self.get(end)
 
         if src == S and dest == T:
-            raise InputError('supporter_on_treasure')
+            return 'supporter_on_treasure'
 
         if not issolid(src):
-            raise InputError('groping_empty_space')
+            return 'groping_empty_space'
 
         if issolid(dest):
-            raise InputError('overlap')
+            return 'overlap'
 
         if isplayer(src) and player != src:
-            raise InputError('moving_other_player')
+            return 'moving_other_player'
 
         if start == self.last_move:
-            raise InputError('already_moved')
+            return 'already_moved'
 
-        if end not in self._project_from(start):
-            raise InputError('move_illegal')
+        return None
 
     def _project_from(self, start):
         """Given a starting position, project rays in all directions
@@ -169,6 +206,60 @@ class Board:
 
         return farthest
 
+    def __str__(self):
+        out = StringIO()
+        self.display(file=out)
+        return out.getvalue().rstrip() # Annoying trailing newline
+
+class Board(Rules):
+    """Represents a game of Treasure Chest."""
+
+    def __init__(self, board_or_size=5, large=False):
+        """Start a game.
+
+        If the argument is a nested list, it will be used as the initial
+        game state; if it is an integer, a new board will be created of
+        that size. Sizes above MAX_SIZE are only allowed if `large` is
+        true.
+
+        """
+        try:
+            self.board = list(board_or_size)
+            self.size = len(self.board)
+        except TypeError:
+            self.board = make_board(board_or_size, large)
+            self.size = board_or_size
+        self.last_move = None
+
+    def copy(self):
+        """Return an independent copy of the game."""
+        result = self.__class__([row[:] for row in self.board])
+        result.last_move = self.last_move
+        return result
+
+    def move(self, player, start, end):
+        """Move a piece from one point to another.
+
+        If the move ends the game, return the player that won;
+        otherwise, return None.
+
+        """
+        # Check it's okay with the rule lawyers
+        self.check_move(player, start, end)
+
+        # Move the piece, bra
+        src, dest = self.get(start), self.get(end)
+        self.set(start, EMPTY)
+        self.set(end, src)
+        self.last_move = tuple(end)
+
+        # If a player moves onto the T, they win!
+        if isplayer(src) and dest == T:
+            assert player == src
+            return player
+        else:
+            return None
+
     def get(self, pos):
         x, y = pos
         return self.board[y][x]
@@ -181,17 +272,12 @@ class Board:
         """Allow iterating over the rows of the board."""
         return iter(self.board)
 
-    def __str__(self):
-        out = StringIO()
-        self.display(file=out)
-        return out.getvalue().rstrip() # Annoying trailing newline
-
     def __repr__(self):
         return '{0}({1})'.format(self.__class__.__name__, self.board)
 
-def make_board(size):
+def make_board(size, large=False):
     """Create an initial board of a certain size. The size must be odd."""
-    if not is_valid_size(size):
+    if not is_valid_size(size, large):
         raise ValueError('invalid size: {0}'.format(size))
 
     board = matrix((size, size), default=EMPTY)
@@ -231,6 +317,41 @@ def add_tuple(xs, ys):
     should be the same length."""
     return tuple(map(operator.add, xs, ys))
 
+def column_name(x):
+    """Return the letters naming a column: ``A`` to ``Z``, then ``AA``,
+    ``AB`` and so on, like a spreadsheet."""
+    name = ''
+    x += 1
+    while x > 0:
+        x, digit = divmod(x - 1, 26)
+        name = string.ascii_uppercase[digit] + name
+    return name
+
+def column_index(name):
+    """The inverse of `column_name`. Raise ValueError if the name isn't
+    made of letters."""
+    if not name.isalpha() or not name.isascii():
+        raise ValueError('invalid column: {0}'.format(name))
+    x = 0
+    for letter in name.upper():
+        x = x * 26 + string.ascii_uppercase.index(letter) + 1
+    return x - 1
+
+def normalise_move(move):
+    """Turn a (start, end) move whose positions are any pair of integers
+    into a pair of tuples. Return None if it isn't a move at all."""
+    try:
+        start, end = move
+        start, end = tuple(start), tuple(end)
+    except (TypeError, ValueError):
+        return None
+    for pos in (start, end):
+        if (len(pos) != 2 or
+                not all(isinstance(c, int) and not isinstance(c, bool)
+                        for c in pos)):
+            return None
+    return start, end
+
 def in_board(pos, size):
     """Return whether a pair represents a valid point on the board."""
     return 0 <= pos[0] < size and 0 <= pos[1] < size
@@ -0,0 +1,200 @@
+"""Searching on several processes at once.
+
+`ParallelSearcher` splits the moves at the root between a pool of worker
+processes. The workers share one transposition table, held in shared
+memory, so what one worker learns about a position the others can use.
+
+The table has no locks. Each entry is two 64-bit words: the data, and
+the key XORed with the data. A reader recomputes the key from both
+words; if another process was halfway through writing the entry, the
+key won't match and the entry is ignored, the same as a miss.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import time
+
+from .position import Position
+from .search import MAX_DEPTH, SearchResult, Searcher, WIN, evaluate
+
+# Entries in the shared table by default: 16 MiB
+DEFAULT_SLOTS = 1 << 20
+
+# Layout of an entry's data word, from the least significant bit
+_DEPTH_BITS, _KIND_BITS, _SCORE_BITS, _COORD_BITS = 8, 2, 16, 6
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_MASK64 = (1 << 64) - 1
+
+class SharedTable:
+    """A transposition table in shared memory, with the same interface
+    as `search.TranspositionTable`.
+
+    Create one with `create` in the parent process; it can be pickled to
+    send it to workers, which attach to the same memory.
+
+    """
+
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        self.slots = memory.size // 16
+        self.words = memory.buf.cast('Q')
+
+    @classmethod
+    def create(cls, slots=DEFAULT_SLOTS):
+        memory = shared_memory.SharedMemory(create=True, size=slots * 16)
+        table = cls(memory, owner=True)
+        table.clear()
+        return table
+
+    @classmethod
+    def attach(cls, name):
+        memory = shared_memory.SharedMemory(name=name)
+        # Only the creator should unlink the memory; don't let this
+        # process's resource tracker do it when the worker exits
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        except (ImportError, AttributeError):
+            pass
+        return cls(memory, owner=False)
+
+    def probe(self, key):
+        index = 2 * (key % self.slots)
+        check, data = self.words[index], self.words[index + 1]
+        if data == 0 or check ^ data != key:
+            return None
+        return _unpack(data)
+
+    def store(self, key, depth, kind, score, move):
+        index = 2 * (key % self.slots)
+        check, data = self.words[index], self.words[index + 1]
+        if data != 0 and check ^ data == key and _unpack(data)[0] > depth:
+            # Keep the deeper result for the same position
+            return
+        data = _pack(depth, kind, score, move)
+        self.words[index + 1] = data
+        self.words[index] = key ^ data
+
+    def clear(self):
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+
+    def __len__(self):
+        return sum(1 for i in range(1, 2 * self.slots, 2) if self.words[i])
+
+    def close(self):
+        """Detach from the memory, and free it if this process made it."""
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __reduce__(self):
+        return (SharedTable.attach, (self.memory.name,))
+
+def _pack(depth, kind, score, move):
+    data = min(depth, (1 << _DEPTH_BITS) - 1)
+    data |= kind << _DEPTH_BITS
+    shift = _DEPTH_BITS + _KIND_BITS
+    data |= (score + _SCORE_OFFSET) << shift
+    shift += _SCORE_BITS
+    if move is not None:
+        data |= 1 << shift
+        (sx, sy), (ex, ey) = move
+        for coord in (sx, sy, ex, ey):
+            shift += _COORD_BITS
+            data |= coord << shift
+    return data & _MASK64
+
+def _unpack(data):
+    depth = data & ((1 << _DEPTH_BITS) - 1)
+    kind = (data >> _DEPTH_BITS) & ((1 << _KIND_BITS) - 1)
+    shift = _DEPTH_BITS + _KIND_BITS
+    score = ((data >> shift) & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET
+    shift += _SCORE_BITS
+    move = None
+    if (data >> shift) & 1:
+        coords = []
+        for _ in range(4):
+            shift += _COORD_BITS
+            coords.append((data >> shift) & ((1 << _COORD_BITS) - 1))
+        move = (coords[0], coords[1]), (coords[2], coords[3])
+    return depth, kind, score, move
+
+# The searcher in each worker process
+_worker = None
+
+def _start_worker(table, evaluate):
+    global _worker
+    _worker = Searcher(evaluate, table)
+
+def _score_move(position, move, depth, deadline):
+    # The deadline is wall-clock time, which all processes agree on
+    seconds = None if deadline is None else deadline - time.time()
+    if seconds is not None and seconds <= 0:
+        return None, 0
+    board = position.to_board()
+    score = _worker.score_move(board, position.player, move, depth, seconds)
+    return score, _worker.nodes
+
+class ParallelSearcher:
+    """Finds good moves using several processes.
+
+    Each iteration of the search hands every root move to the pool, and
+    waits for all of them before going a ply deeper. Use it as a context
+    manager, or call `close`, to stop the workers and free the table.
+
+    """
+
+    def __init__(self, workers, slots=DEFAULT_SLOTS, evaluate=evaluate):
+        self.table = SharedTable.create(slots)
+        self.pool = ProcessPoolExecutor(workers, initializer=_start_worker,
+                                        initargs=(self.table, evaluate))
+        self.workers = workers
+
+    def search(self, board, player, depth=MAX_DEPTH, seconds=None):
+        """Like `Searcher.search`."""
+        started = time.perf_counter()
+        deadline = None if seconds is None else time.time() + seconds
+        position = Position.from_board(board, player)
+        moves = board.valid_moves(player)
+        result = SearchResult(None, 0, 0, 0, 0.0)
+        nodes = 0
+
+        for current in range(1, depth + 1):
+            if deadline is not None and time.time() >= deadline:
+                break
+            futures = [(move, self.pool.submit(_score_move, position, move,
+                                               current, deadline))
+                       for move in moves]
+            scores = {}
+            for move, future in futures:
+                score, worker_nodes = future.result()
+                nodes += worker_nodes
+                if score is not None:
+                    scores[move] = score
+            if len(scores) < len(moves) or not moves:
+                # Out of time: this iteration didn't finish
+                break
+
+            best_move = max(moves, key=scores.get)
+            best_score = scores[best_move]
+            result = SearchResult(best_move, best_score, current, nodes,
+                                  time.perf_counter() - started)
+            # Look at the best moves first next time
+            moves.sort(key=scores.get, reverse=True)
+            if abs(best_score) >= WIN - MAX_DEPTH:
+                break
+
+        return result._replace(nodes=nodes, seconds=time.perf_counter() - started)
+
+    def close(self):
+        self.pool.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
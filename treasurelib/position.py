@@ -0,0 +1,130 @@
+"""Immutable game positions.
+
+A `Board` is cheap to change but expensive to share: handing one to
+another thread or process means copying the whole thing. A `Position`
+can never change, so it can be shared freely. Making a move returns a
+new position that reuses every row of the old one except the (at most
+two) rows the move touched.
+
+Positions are hashable, so they can be used as dictionary keys, and
+pickle to little more than one byte per square.
+
+"""
+
+from math import isqrt
+
+from .model import Board, EMPTY, PLAYERS, Rules, T, X, Y, isplayer
+
+class Position(Rules):
+    """An immutable game position: the pieces on the board, the square
+    the last move ended on, and the player to move.
+
+    `rows` is a tuple of strings, one character per square.
+
+    """
+
+    __slots__ = ('rows', 'size', 'last_move', 'player', '_hash')
+
+    def __init__(self, rows, last_move=None, player=X):
+        rows = tuple(''.join(row) for row in rows)
+        if any(len(row) != len(rows) for row in rows):
+            raise ValueError('board is not square')
+        if player not in PLAYERS:
+            raise ValueError('invalid player: {0}'.format(player))
+        _init(self, rows, last_move, player)
+
+    @classmethod
+    def from_board(cls, board, player=X):
+        """Take a snapshot of a Board."""
+        return cls(board, board.last_move, player)
+
+    def to_board(self):
+        """Return a new Board with the same pieces and last move."""
+        board = Board([list(row) for row in self.rows])
+        board.last_move = self.last_move
+        return board
+
+    def play(self, start, end):
+        """Make a move for the player whose turn it is.
+
+        Return a pair ``(position, winner)``: the position after the
+        move, and the player that won or None. Raise an InputError if
+        the move is invalid.
+
+        """
+        self.check_move(self.player, start, end)
+        (sx, sy), (ex, ey) = start, end
+        src, dest = self.rows[sy][sx], self.rows[ey][ex]
+
+        rows = list(self.rows)
+        rows[sy] = _replace(rows[sy], sx, EMPTY)
+        rows[ey] = _replace(rows[ey], ex, src)
+
+        result = Position.__new__(Position)
+        _init(result, tuple(rows), end, Y if self.player == X else X)
+        winner = self.player if isplayer(src) and dest == T else None
+        return result, winner
+
+    def children(self):
+        """Return a list of ``(move, position, winner)`` for every valid
+        move from this position."""
+        return [((start, end),) + self.play(start, end)
+                for start, end in self.valid_moves(self.player)]
+
+    def get(self, pos):
+        x, y = pos
+        return self.rows[y][x]
+
+    def __iter__(self):
+        """Allow iterating over the rows of the board."""
+        return iter(self.rows)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('positions are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('positions are immutable')
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self._hash == other._hash and self.rows == other.rows and
+                self.last_move == other.last_move and
+                self.player == other.player)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Pickle as one string of squares, rather than a tuple of rows
+        if self.last_move is None:
+            last = -1
+        else:
+            last = self.last_move[1] * self.size + self.last_move[0]
+        return (_unpickle, (''.join(self.rows).encode('ascii'), last, self.player))
+
+    def __repr__(self):
+        return '{0}({1!r}, {2!r}, {3!r})'.format(
+            self.__class__.__name__, self.rows, self.last_move, self.player)
+
+def _init(position, rows, last_move, player):
+    """Fill in the slots of a new position, skipping the checks in
+    `Position.__init__`."""
+    setattr_ = object.__setattr__
+    setattr_(position, 'rows', rows)
+    setattr_(position, 'size', len(rows))
+    setattr_(position, 'last_move', None if last_move is None else tuple(last_move))
+    setattr_(position, 'player', player)
+    setattr_(position, '_hash', hash((rows, position.last_move, player)))
+
+def _replace(row, x, piece):
+    return row[:x] + piece + row[x+1:]
+
+def _unpickle(squares, last, player):
+    size = isqrt(len(squares))
+    squares = squares.decode('ascii')
+    rows = tuple(squares[y*size:(y+1)*size] for y in range(size))
+    last_move = None if last < 0 else (last % size, last // size)
+    position = Position.__new__(Position)
+    _init(position, rows, last_move, player)
+    return position
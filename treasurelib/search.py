@@ -0,0 +1,270 @@
+"""Game tree search: negamax with alpha-beta pruning, iterative
+deepening and a transposition table."""
+
+from collections import namedtuple
+import time
+
+from .model import EMPTY, T, X, Y
+from .symmetry import canonical_hash, transform_move
+
+WIN = 10000
+INFINITY = WIN + 1
+MAX_DEPTH = 64
+
+# Kinds of transposition table entry
+EXACT, LOWER, UPPER = 0, 1, 2
+
+SearchResult = namedtuple('SearchResult', 'move score depth nodes seconds')
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time is up."""
+
+def other(player):
+    """Return the player who isn't this one."""
+    return Y if player == X else X
+
+def evaluate(board, player):
+    """Estimate how good a position is for the player to move, without
+    searching: the difference between how many moves each player's own
+    piece has."""
+    return _mobility(board, player) - _mobility(board, other(player))
+
+def _mobility(board, player):
+    for y, row in enumerate(board):
+        for x, piece in enumerate(row):
+            if piece == player:
+                if (x, y) == board.last_move:
+                    return 0
+                return len(board._project_from((x, y)))
+    return 0
+
+class TranspositionTable:
+    """Remembers the results of earlier searches, keyed by the 64-bit
+    hash of a canonical position. Moves are stored in canonical
+    coordinates."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def probe(self, key):
+        """Return ``(depth, kind, score, move)``, or None if the
+        position hasn't been seen."""
+        return self.entries.get(key)
+
+    def store(self, key, depth, kind, score, move):
+        old = self.entries.get(key)
+        if old is None or old[0] <= depth:
+            self.entries[key] = (depth, kind, score, move)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class Searcher:
+    """Finds good moves.
+
+    `evaluate` scores leaf positions; `table` is the transposition
+    table, which is kept between searches. If `book` is given, its
+    `probe` method is consulted before searching.
+
+    """
+
+    def __init__(self, evaluate=evaluate, table=None, book=None):
+        self.evaluate = evaluate
+        self.table = TranspositionTable() if table is None else table
+        self.book = book
+        self.nodes = 0
+        self.deadline = None
+        self.interrupted = False
+
+    def search(self, board, player, depth=MAX_DEPTH, seconds=None,
+               interruptible=False):
+        """Search a position to the given depth, or until the time runs
+        out, whichever comes first. The board is left as it was found.
+
+        Return a SearchResult for the deepest search that finished. If
+        not even a one-ply search finished in time, its move is None.
+
+        If `interruptible` is true, Ctrl-C stops the search early as if
+        the time had run out, and sets the `interrupted` attribute.
+
+        """
+        started = time.perf_counter()
+        self.nodes = 0
+        self.interrupted = False
+        self.deadline = None if seconds is None else started + seconds
+        result = SearchResult(None, 0, 0, 0, 0.0)
+        try:
+            if self.book is not None:
+                hit = self.book.probe(board, player)
+                if hit is not None:
+                    move, score, book_depth = hit
+                    return SearchResult(move, score, book_depth, 0,
+                                        time.perf_counter() - started)
+
+            for current in range(1, depth + 1):
+                score, move = self._root(board, player, current)
+                result = SearchResult(move, score, current, self.nodes,
+                                      time.perf_counter() - started)
+                if abs(score) >= WIN - MAX_DEPTH:
+                    # Found a forced result; searching deeper won't help
+                    break
+        except SearchTimeout:
+            pass
+        except KeyboardInterrupt:
+            if not interruptible:
+                raise
+            self.interrupted = True
+        return result._replace(nodes=self.nodes,
+                               seconds=time.perf_counter() - started)
+
+    def score_move(self, board, player, move, depth, seconds=None):
+        """Search the position after one move to the given depth,
+        counting the move itself. Return its score for the player who
+        made it, or None if the time ran out first.
+
+        This lets callers split the moves at the root between several
+        searchers; `nodes` counts the work done.
+
+        """
+        self.nodes = 0
+        self.deadline = None if seconds is None else time.perf_counter() + seconds
+        try:
+            return self._score_move(board, player, move, depth, -INFINITY)
+        except SearchTimeout:
+            return None
+
+    def _score_move(self, board, player, move, depth, alpha):
+        captured, last_move = _make(board, move)
+        try:
+            if captured == T and board.get(move[1]) == player:
+                return WIN - 1
+            return -self._negamax(board, other(player), depth - 1,
+                                  -INFINITY, -alpha, 1)
+        finally:
+            _unmake(board, move, captured, last_move)
+
+    def _root(self, board, player, depth):
+        best_score, best_move = -INFINITY, None
+        for move in self._ordered_moves(board, player):
+            self._check_clock()
+            score = self._score_move(board, player, move, depth, best_score)
+            if score > best_score:
+                best_score, best_move = score, move
+        if best_move is None:
+            return 0, None
+        key, transform = canonical_hash(board, player)
+        self.table.store(key, depth, EXACT, best_score,
+                         transform_move(best_move, transform, board.size))
+        return best_score, best_move
+
+    def _negamax(self, board, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        self._check_clock()
+
+        moves = board.valid_moves(player)
+        for start, end in moves:
+            if board.get(end) == T and board.get(start) == player:
+                return WIN - ply - 1
+        if not moves:
+            return 0
+        if depth <= 0:
+            return self.evaluate(board, player)
+
+        key, transform = canonical_hash(board, player)
+        entry = self.table.probe(key)
+        hint = None
+        if entry is not None:
+            entry_depth, kind, score, hint = entry
+            score = _from_table(score, ply)
+            if entry_depth >= depth:
+                if kind == EXACT:
+                    return score
+                if kind == LOWER and score >= beta:
+                    return score
+                if kind == UPPER and score <= alpha:
+                    return score
+            if hint is not None:
+                hint = transform_move(hint, transform, board.size)
+                if hint in moves:
+                    moves.remove(hint)
+                    moves.insert(0, hint)
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, None
+        for move in moves:
+            captured, last_move = _make(board, move)
+            try:
+                score = -self._negamax(board, other(player), depth - 1,
+                                       -beta, -alpha, ply + 1)
+            finally:
+                _unmake(board, move, captured, last_move)
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.table.store(key, depth, kind, _to_table(best_score, ply),
+                         transform_move(best_move, transform, board.size))
+        return best_score
+
+    def _check_clock(self):
+        # A node costs far more than reading the clock, and a lot more
+        # on large boards, so look at it every time
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def _ordered_moves(self, board, player):
+        """Return the player's moves, with the move the table remembers
+        (if any) first."""
+        moves = board.valid_moves(player)
+        key, transform = canonical_hash(board, player)
+        entry = self.table.probe(key)
+        if entry is not None and entry[3] is not None:
+            hint = transform_move(entry[3], transform, board.size)
+            if hint in moves:
+                moves.remove(hint)
+                moves.insert(0, hint)
+        return moves
+
+def _make(board, move):
+    """Make a move known to be valid, skipping the rule checks in
+    `Board.move`. Return what's needed to take it back again."""
+    start, end = move
+    captured, last_move = board.get(end), board.last_move
+    board.set(end, board.get(start))
+    board.set(start, EMPTY)
+    board.last_move = end
+    return captured, last_move
+
+def _unmake(board, move, captured, last_move):
+    start, end = move
+    board.set(start, board.get(end))
+    board.set(end, captured)
+    board.last_move = last_move
+
+# Win scores count plies from the root, but the table is shared between
+# nodes at different plies: store them counting from the node instead.
+
+def _to_table(score, ply):
+    if score >= WIN - MAX_DEPTH * 2:
+        return score + ply
+    if score <= -(WIN - MAX_DEPTH * 2):
+        return score - ply
+    return score
+
+def _from_table(score, ply):
+    if score >= WIN - MAX_DEPTH * 2:
+        return score - ply
+    if score <= -(WIN - MAX_DEPTH * 2):
+        return score + ply
+    return score
@@ -0,0 +1,146 @@
+"""Persistent store of analysed positions, backed by SQLite.
+
+Positions are stored in canonical form (see `symmetry`), so one row
+covers every position equivalent to it. Writes are buffered and flushed
+in batches, each in a single transaction; when a position is written
+twice, the result from the deeper search wins. Reads go through a small
+LRU cache.
+
+"""
+
+from collections import namedtuple, OrderedDict
+import sqlite3
+
+from .symmetry import canonical_key, transform_move
+
+Evaluation = namedtuple('Evaluation', 'score move depth')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS positions (
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    sx INTEGER, sy INTEGER, ex INTEGER, ey INTEGER,
+    depth INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS positions_key ON positions (key);
+'''
+
+UPSERT = '''
+INSERT INTO positions (key, size, score, sx, sy, ex, ey, depth)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    score = excluded.score,
+    sx = excluded.sx, sy = excluded.sy, ex = excluded.ex, ey = excluded.ey,
+    depth = excluded.depth
+WHERE excluded.depth > positions.depth
+'''
+
+SELECT = 'SELECT score, sx, sy, ex, ey, depth FROM positions WHERE key = ?'
+
+class PositionStore:
+    """A database of (position, score, best move, depth) results.
+
+    Writes are held back until `batch_size` of them have piled up, or
+    until `flush` or `close` is called. Reads always see them, though.
+
+    """
+
+    def __init__(self, path, batch_size=1000, cache_size=4096):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.pending = {}
+        self.cache = OrderedDict()
+
+    def put(self, board, player, score, move, depth):
+        """Record the result of searching a position. The move is in the
+        board's own coordinates, and may be None."""
+        key, transform = canonical_key(board, player)
+        if move is None:
+            (sx, sy), (ex, ey) = (None, None), (None, None)
+        else:
+            (sx, sy), (ex, ey) = transform_move(move, transform, board.size)
+        old = self.pending.get(key)
+        if old is None or old[-1] < depth:
+            self.pending[key] = (key, board.size, score, sx, sy, ex, ey, depth)
+        self.cache.pop(key, None)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def put_many(self, results):
+        """Record many results at once. Each result is a tuple of
+        arguments to `put`."""
+        for result in results:
+            self.put(*result)
+
+    def flush(self):
+        """Write out any buffered results in one transaction."""
+        if self.pending:
+            with self.connection:
+                self.connection.executemany(UPSERT, self.pending.values())
+            # Reads may have cached the rows these writes just replaced
+            for key in self.pending:
+                self.cache.pop(key, None)
+            self.pending.clear()
+
+    def get(self, board, player):
+        """Look up a position. Return an Evaluation with the move in the
+        board's own coordinates, or None if the position isn't stored."""
+        key, transform = canonical_key(board, player)
+        found = self._get(key)
+        if found is None:
+            return None
+        score, move, depth = found
+        if move is not None:
+            move = transform_move(move, transform, board.size)
+        return Evaluation(score, move, depth)
+
+    def _get(self, key):
+        stored = self._stored(key)
+        pending = self.pending.get(key)
+        if pending is None:
+            return stored
+        # The buffered write only replaces the stored row if it's deeper,
+        # so a read shouldn't depend on whether it has been flushed yet
+        pending = _evaluation(pending[2:])
+        if stored is not None and stored.depth >= pending.depth:
+            return stored
+        return pending
+
+    def _stored(self, key):
+        """Look up a key in the cache, then the database."""
+        try:
+            found = self.cache[key]
+        except KeyError:
+            row = self.connection.execute(SELECT, (key,)).fetchone()
+            found = None if row is None else _evaluation(row)
+            self.cache[key] = found
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return found
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _evaluation(row):
+    score, sx, sy, ex, ey, depth = row
+    move = None if sx is None else ((sx, sy), (ex, ey))
+    return Evaluation(score, move, depth)
@@ -0,0 +1,120 @@
+"""Symmetries of the Treasure Chest board.
+
+The rules don't care which way up the board is, so a position means the
+same thing when it is mirrored left to right. It also means the same
+thing when it is flipped top to bottom, as long as the two players swap
+pieces (and turns) at the same time. Together with the identity and
+their combination, these make four transforms that leave the starting
+position unchanged.
+
+Every position is equivalent to up to four others, so anything that
+stores positions -- transposition tables, solved-position stores,
+training sets -- can store the *canonical* one instead and cover the
+rest for free. Moves found in the canonical position are mapped back
+with `transform_move`. Every transform is its own inverse.
+
+"""
+
+from hashlib import blake2b
+
+from .model import Board, X, Y
+
+# Transforms are bit flags; composing two is the same as XORing them
+IDENTITY = 0
+MIRROR = 1  # Swap left and right
+FLIP = 2    # Swap top and bottom, and X and Y
+ROTATE = MIRROR | FLIP
+TRANSFORMS = (IDENTITY, MIRROR, FLIP, ROTATE)
+
+_SWAP_PLAYERS = str.maketrans({X: Y, Y: X})
+
+def transform_pos(pos, transform, size):
+    """Map a point on a board of the given size through a transform."""
+    if pos is None:
+        return None
+    x, y = pos
+    if transform & MIRROR:
+        x = size - 1 - x
+    if transform & FLIP:
+        y = size - 1 - y
+    return x, y
+
+def transform_move(move, transform, size):
+    """Map a (start, end) pair through a transform."""
+    start, end = move
+    return (transform_pos(start, transform, size),
+            transform_pos(end, transform, size))
+
+def transform_player(player, transform):
+    """Return the player who takes the given player's place."""
+    if transform & FLIP:
+        return player.translate(_SWAP_PLAYERS)
+    return player
+
+def transform_board(board, transform):
+    """Return a new Board that is the image of another under a
+    transform."""
+    rows = _transform_rows(_rows(board), transform)
+    result = Board([list(row) for row in rows])
+    result.last_move = transform_pos(board.last_move, transform, board.size)
+    return result
+
+def canonical(board, player):
+    """Find the canonical representative of a position.
+
+    Return a tuple ``(board, player, transform)``: the canonical board,
+    the player to move in it, and the transform that maps the original
+    position onto it. Since every transform is its own inverse, the
+    same transform maps moves in the canonical position back again.
+
+    """
+    _, transform = canonical_key(board, player)
+    return (transform_board(board, transform),
+            transform_player(player, transform),
+            transform)
+
+def canonical_key(board, player):
+    """Return a string that identifies a position up to symmetry, along
+    with the transform that maps the position onto its canonical
+    form."""
+    rows = _rows(board)
+    return min((_key(_transform_rows(rows, transform),
+                     transform_pos(board.last_move, transform, board.size),
+                     transform_player(player, transform)),
+                transform)
+               for transform in TRANSFORMS)
+
+def canonical_hash(board, player):
+    """Like `canonical_key`, but return a 64-bit integer instead of a
+    string. Unlike the built-in `hash`, the result is the same in every
+    process, so it can be written to disk."""
+    key, transform = canonical_key(board, player)
+    digest = blake2b(key.encode('ascii'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big'), transform
+
+def position_key(board, player):
+    """Return a string that identifies a position exactly.
+
+    Two positions have the same key if and only if they have the same
+    pieces in the same places, the same piece was moved last, and the
+    same player is to move.
+
+    """
+    return _key(_rows(board), board.last_move, player)
+
+def _rows(board):
+    return [''.join(row) for row in board]
+
+def _transform_rows(rows, transform):
+    if transform & MIRROR:
+        rows = [row[::-1] for row in rows]
+    if transform & FLIP:
+        rows = [row.translate(_SWAP_PLAYERS) for row in reversed(rows)]
+    return rows
+
+def _key(rows, last_move, player):
+    if last_move is None:
+        last = '-'
+    else:
+        last = '{0},{1}'.format(*last_move)
+    return '{0} {1} {2}'.format('/'.join(rows), last, player)
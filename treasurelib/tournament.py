@@ -0,0 +1,322 @@
+"""Play engines against each other and estimate their relative
+strength.
+
+Engines are separate programs that speak the protocol in `engine`. Each
+pair of engines plays a number of games, swapping sides every game.
+Many games run at once; the runner only waits on the engines, and keeps
+their processes alive between games so starting them up isn't counted
+against anyone.
+
+Every move is checked against the rules. An engine loses a game if it
+makes an illegal move, runs out of time, or dies. A game that goes on
+too long is a draw. For example::
+
+    python -m treasurelib.tournament \\
+        "python -m treasurelib.engine --name a" \\
+        "python -m treasurelib.engine --name b" \\
+        --games 100 --concurrency 8 --time 200
+
+"""
+
+import argparse
+import asyncio
+from collections import Counter, namedtuple
+from itertools import combinations
+import math
+import shlex
+
+from .cli import parse_move
+from .engine import format_position_command
+from .model import Board, InputError, MIN_SIZE, X, Y
+from .search import other
+
+# Extra time allowed for each move, on top of the engine's budget, to
+# cover the time it takes to pass messages back and forth
+MARGIN_MS = 100
+
+# How long an engine has to start up and say hello
+STARTUP_SECONDS = 10
+
+Outcome = namedtuple('Outcome', 'winner reason plies')
+
+class EngineError(Exception):
+    """Raised when an engine breaks the protocol or dies."""
+
+class EngineProcess:
+    """A running engine."""
+
+    def __init__(self, command):
+        self.command = command
+        self.name = command[0]
+        self.process = None
+
+    async def start(self):
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+        except OSError as ex:
+            raise EngineError('cannot start {0}: {1}'.format(self.name, ex))
+        await self.send('hello')
+        words = (await self.receive(STARTUP_SECONDS)).split()
+        if len(words) != 2 or words[0] != 'hello':
+            raise EngineError('bad greeting from {0}'.format(self.name))
+        self.name = words[1]
+
+    async def send(self, line):
+        self.process.stdin.write(line.encode('ascii') + b'\n')
+        try:
+            await self.process.stdin.drain()
+        except ConnectionError:
+            raise EngineError('{0} has exited'.format(self.name))
+
+    async def receive(self, timeout):
+        """Read a line. Raise asyncio.TimeoutError if it takes longer
+        than `timeout` seconds."""
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise EngineError('{0} has exited'.format(self.name))
+        return line.decode('ascii', 'replace').strip()
+
+    async def best_move(self, board, player, milliseconds):
+        """Ask for a move. Return the text of the move, or None if the
+        engine says there are no legal moves."""
+        await self.send(format_position_command(board, player))
+        await self.send('go {0}'.format(milliseconds))
+        words = (await self.receive((milliseconds + MARGIN_MS) / 1000)).split()
+        if len(words) != 2 or words[0] != 'move':
+            raise EngineError('bad reply from {0}'.format(self.name))
+        return None if words[1] == 'none' else words[1]
+
+    async def close(self):
+        if self.process.returncode is None:
+            try:
+                await self.send('quit')
+            except EngineError:
+                pass
+            try:
+                await asyncio.wait_for(self.process.wait(), 1)
+            except asyncio.TimeoutError:
+                self.kill()
+        await self.process.wait()
+
+    def kill(self):
+        if self.process.returncode is None:
+            self.process.kill()
+
+class EnginePool:
+    """Idle processes for one engine, so they can be reused between
+    games."""
+
+    def __init__(self, command):
+        self.command = command
+        self.name = command[0]
+        self.idle = []
+        self.busy = set()
+        self.dead = []
+
+    async def acquire(self):
+        """Return an idle engine, starting a new one if there are none.
+        If it fails to start, raise EngineError or asyncio.TimeoutError."""
+        if self.idle:
+            engine = self.idle.pop()
+        else:
+            engine = EngineProcess(self.command)
+            try:
+                await engine.start()
+            except asyncio.TimeoutError:
+                # Still running, but not talking; reap it when the pool
+                # closes
+                engine.kill()
+                self.dead.append(engine)
+                raise
+            except EngineError:
+                # Probably exited already. Killing it would race with
+                # asyncio reaping it, so let close() take care of it.
+                self.dead.append(engine)
+                raise
+            self.name = engine.name
+        self.busy.add(engine)
+        return engine
+
+    def release(self, engine, healthy=True):
+        """Give back an engine. If it timed out or misbehaved, it might
+        still be talking about the last game, so kill it instead."""
+        self.busy.discard(engine)
+        if healthy:
+            self.idle.append(engine)
+        else:
+            engine.kill()
+            self.dead.append(engine)
+
+    async def close(self):
+        for engine in self.busy:
+            engine.kill()
+        engines = self.idle + list(self.busy) + self.dead
+        await asyncio.gather(*(engine.close() for engine in engines
+                               if engine.process is not None))
+        self.idle = []
+        self.busy.clear()
+        self.dead = []
+
+async def play_game(pools, size, milliseconds, max_plies):
+    """Play one game between engines from two pools: a dict mapping each
+    player to a pool. Return an Outcome."""
+    engines = {}
+    healthy = {X: True, Y: True}
+    try:
+        for player in (X, Y):
+            try:
+                engines[player] = await pools[player].acquire()
+            except (EngineError, asyncio.TimeoutError):
+                return Outcome(other(player), 'crash', 0)
+
+        board = Board(size, large=True)
+        player = X
+        for ply in range(max_plies):
+            try:
+                text = await engines[player].best_move(board, player, milliseconds)
+            except asyncio.TimeoutError:
+                healthy[player] = False
+                return Outcome(other(player), 'time', ply)
+            except EngineError:
+                healthy[player] = False
+                return Outcome(other(player), 'crash', ply)
+
+            if text is None:
+                if board.valid_moves(player):
+                    return Outcome(other(player), 'illegal', ply)
+                return Outcome(None, 'stuck', ply)
+
+            try:
+                start, end = parse_move(text)
+                board.check_move(player, start, end)
+            except InputError:
+                return Outcome(other(player), 'illegal', ply)
+
+            if board.move(player, start, end) is not None:
+                return Outcome(player, 'treasure', ply + 1)
+            player = other(player)
+
+        return Outcome(None, 'max_plies', max_plies)
+    finally:
+        for player, engine in engines.items():
+            pools[player].release(engine, healthy[player])
+
+class Pairing:
+    """The results of the games between two engines, from the point of
+    view of the first."""
+
+    def __init__(self):
+        self.wins = self.draws = self.losses = 0
+        self.reasons = Counter()
+
+    def add(self, score, reason):
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.reasons[reason] += 1
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self):
+        return (self.wins + self.draws / 2) / self.games
+
+    def elo(self):
+        """Estimate the Elo difference between the engines. Return a
+        pair ``(difference, margin)``, where the true difference lies
+        within the margin with 95% confidence. Either may be infinite."""
+        p = self.score
+        n = self.games
+        variance = (self.wins * (1 - p) ** 2 + self.draws * (0.5 - p) ** 2 +
+                    self.losses * p ** 2) / n
+        spread = 1.96 * math.sqrt(variance / n)
+        low, high = elo_difference(p - spread), elo_difference(p + spread)
+        if math.isfinite(low) and math.isfinite(high):
+            margin = (high - low) / 2
+        else:
+            margin = math.inf
+        return elo_difference(p), margin
+
+def elo_difference(score):
+    """Convert an expected score between 0 and 1 to an Elo difference."""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return 400 * math.log10(score / (1 - score))
+
+async def run_tournament(commands, games, concurrency, size, milliseconds,
+                         max_plies, progress=None):
+    """Play `games` games between each pair of engines. Return a dict
+    mapping pairs of engine indices to Pairings, and a list of engine
+    names."""
+    pools = [EnginePool(command) for command in commands]
+    results = {pair: Pairing() for pair in combinations(range(len(commands)), 2)}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one_game(first, second, number):
+        # Swap sides every game
+        if number % 2 == 0:
+            sides = {X: first, Y: second}
+        else:
+            sides = {X: second, Y: first}
+        async with limit:
+            outcome = await play_game({player: pools[index]
+                                       for player, index in sides.items()},
+                                      size, milliseconds, max_plies)
+        if outcome.winner is None:
+            score = 0.5
+        else:
+            score = 1 if sides[outcome.winner] == first else 0
+        results[first, second].add(score, outcome.reason)
+        if progress is not None:
+            progress()
+
+    try:
+        await asyncio.gather(*(one_game(first, second, number)
+                               for first, second in results
+                               for number in range(games)))
+    finally:
+        for pool in pools:
+            await pool.close()
+    return results, [pool.name for pool in pools]
+
+def report(results, names):
+    for (first, second), pairing in sorted(results.items()):
+        difference, margin = pairing.elo()
+        print('{0} vs {1}: +{2} ={3} -{4}, score {5:.1%}, Elo {6:+.0f} +/- {7:.0f}'.format(
+            names[first], names[second], pairing.wins, pairing.draws,
+            pairing.losses, pairing.score, difference, margin))
+        print('    ' + ', '.join('{0}: {1}'.format(reason, count)
+                                 for reason, count in sorted(pairing.reasons.items())))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treasure Chest tournament')
+    parser.add_argument('engines', nargs='+', help='commands that run the engines')
+    parser.add_argument('--games', type=int, default=10,
+                        help='games between each pair of engines')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--size', type=int, default=MIN_SIZE)
+    parser.add_argument('--time', type=int, default=100,
+                        help='milliseconds per move')
+    parser.add_argument('--max-plies', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if len(args.engines) < 2:
+        parser.error('need at least two engines')
+
+    commands = [shlex.split(engine) for engine in args.engines]
+    results, names = asyncio.run(run_tournament(
+        commands, args.games, args.concurrency, args.size, args.time,
+        args.max_plies))
+    report(results, names)
+
+if __name__ == '__main__':
+    main()
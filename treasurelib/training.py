@@ -0,0 +1,342 @@
+"""Learning an evaluation function from self-play.
+
+The pipeline has three steps:
+
+1. `self_play` plays games between shallow searchers, with some random
+   moves mixed in, and labels every position with how the game turned
+   out for the player to move.
+2. `features` turns a batch of positions into a matrix of feature
+   vectors, all at once with NumPy. `position_features` does the same
+   for a single position in plain Python, which is much faster than a
+   batch of one.
+3. `fit` finds the weights, by least squares or logistic regression.
+
+The weights are saved as JSON; `Evaluator.load` reads them back into
+something `search.Searcher` can use as its `evaluate`. From the command
+line::
+
+    python -m treasurelib.training generate data.npz --games 500
+    python -m treasurelib.training fit data.npz weights.json
+    python -m treasurelib.engine --weights weights.json
+
+This module needs NumPy, which the rest of the package doesn't.
+
+"""
+
+import argparse
+import json
+import random
+import sys
+
+import numpy as np
+
+from .model import Board, EMPTY, MIN_SIZE, PLAYERS, S, T, issolid
+from .search import MAX_DEPTH, WIN, Searcher, other
+from .symmetry import canonical, canonical_key
+
+# How the pieces are stored in arrays. Positions are always stored from
+# the point of view of the player to move, who is OWN.
+CODES = {EMPTY: 0, S: 1, T: 2}
+OWN, OPPONENT = 3, 4
+
+FEATURES = ('tempo', 'aligned', 'open_line', 'threat', 'distance', 'mobility')
+
+_DIRECTIONS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+               if (dx, dy) != (0, 0)]
+DIRECTIONS = np.array(_DIRECTIONS)
+
+# Evaluations are scaled by this much, and kept well clear of the scores
+# the search uses for wins
+SCALE = 100
+LIMIT = WIN - 4 * MAX_DEPTH
+
+def encode(positions):
+    """Encode a list of ``(board, player)`` pairs, all the same size.
+
+    Return a pair of arrays: the squares, with shape ``(n, size, size)``,
+    and the last moves, with shape ``(n, 2)`` (-1 for none).
+
+    """
+    size = positions[0][0].size
+    grids = np.empty((len(positions), size, size), dtype=np.int8)
+    last = np.full((len(positions), 2), -1, dtype=np.int16)
+    for i, (board, player) in enumerate(positions):
+        codes = dict(CODES)
+        codes[player], codes[other(player)] = OWN, OPPONENT
+        grids[i] = [[codes[piece] for piece in row] for row in board]
+        if board.last_move is not None:
+            last[i] = board.last_move
+    return grids, last
+
+def features(grids, last):
+    """Compute the feature matrix for a batch of encoded positions.
+
+    Each feature is the player to move's value minus the opponent's:
+
+    aligned
+        the piece is on a line (across, down or diagonal) with the
+        treasure
+    open_line
+        ...and nothing is in the way
+    threat
+        ...and the piece would stop on the treasure, so it can move
+        there next turn (unless it just moved)
+    distance
+        how many squares the piece is from the treasure, as a fraction
+        of the board size
+    mobility
+        how many directions the piece can move in
+
+    `tempo` is always 1, and measures the value of having the move.
+
+    """
+    n, size = grids.shape[0], grids.shape[1]
+    flat = grids.reshape(n, -1)
+    rows = np.arange(n)
+    solid = (grids == CODES[S]) | (grids >= OWN)
+    ty, tx = np.divmod(np.argmax(flat == CODES[T], axis=1), size)
+
+    result = np.empty((n, len(FEATURES)))
+    result[:, 0] = 1
+    result[:, 1:] = 0
+    for sign, code in ((1, OWN), (-1, OPPONENT)):
+        present = (flat == code).any(axis=1)
+        py, px = np.divmod(np.argmax(flat == code, axis=1), size)
+        dx, dy = tx - px, ty - py
+        distance = np.maximum(abs(dx), abs(dy))
+        aligned = present & (distance > 0) & (
+            (dx == 0) | (dy == 0) | (abs(dx) == abs(dy)))
+        sx, sy = np.sign(dx), np.sign(dy)
+
+        # Look at every square between the piece and the treasure
+        steps = np.arange(1, size)
+        between = steps < distance[:, None]
+        xs = np.clip(px[:, None] + sx[:, None] * steps, 0, size - 1)
+        ys = np.clip(py[:, None] + sy[:, None] * steps, 0, size - 1)
+        blocked = (between & solid[rows[:, None], ys, xs]).any(axis=1)
+        open_line = aligned & ~blocked
+
+        # The piece stops on the treasure if the next square is solid
+        # or off the board
+        bx, by = tx + sx, ty + sy
+        off = (bx < 0) | (bx >= size) | (by < 0) | (by >= size)
+        beyond = solid[rows, np.clip(by, 0, size - 1), np.clip(bx, 0, size - 1)]
+        moved = (last[:, 0] == px) & (last[:, 1] == py)
+        threat = open_line & (off | beyond) & ~moved
+
+        ax = px[:, None] + DIRECTIONS[:, 0]
+        ay = py[:, None] + DIRECTIONS[:, 1]
+        inside = (ax >= 0) & (ax < size) & (ay >= 0) & (ay < size)
+        free = ~solid[rows[:, None], np.clip(ay, 0, size - 1), np.clip(ax, 0, size - 1)]
+        mobility = np.where(moved, 0, (inside & free).sum(axis=1))
+
+        result[:, 1] += sign * aligned
+        result[:, 2] += sign * open_line
+        result[:, 3] += sign * threat
+        result[:, 4] += sign * np.where(present, distance / (size - 1), 1)
+        result[:, 5] += sign * mobility * present
+    return result
+
+def position_features(board, player):
+    """Compute the feature vector for a single position, as a list.
+
+    The same as a row of `features`, but without NumPy, whose overhead
+    dominates when there's only one position. The search calls the
+    evaluation once per leaf, so this is the path it takes.
+
+    """
+    rows = list(board)
+    size = board.size
+    found = {}
+    for y, row in enumerate(rows):
+        for x, piece in enumerate(row):
+            if piece not in found:
+                found[piece] = x, y
+    tx, ty = found.get(T, (0, 0))
+
+    result = [1, 0, 0, 0, 0, 0]
+    for sign, piece in ((1, player), (-1, other(player))):
+        if piece not in found:
+            result[4] += sign
+            continue
+        px, py = found[piece]
+        dx, dy = tx - px, ty - py
+        distance = max(abs(dx), abs(dy))
+        aligned = distance > 0 and (dx == 0 or dy == 0 or abs(dx) == abs(dy))
+        sx, sy = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
+        open_line = aligned and not any(
+            issolid(rows[py + sy * step][px + sx * step])
+            for step in range(1, distance))
+        moved = (px, py) == board.last_move
+        if open_line and not moved:
+            bx, by = tx + sx, ty + sy
+            threat = (not (0 <= bx < size and 0 <= by < size)
+                      or issolid(rows[by][bx]))
+        else:
+            threat = False
+        mobility = 0
+        if not moved:
+            for ex, ey in _DIRECTIONS:
+                ax, ay = px + ex, py + ey
+                if 0 <= ax < size and 0 <= ay < size and not issolid(rows[ay][ax]):
+                    mobility += 1
+
+        result[1] += sign * aligned
+        result[2] += sign * open_line
+        result[3] += sign * threat
+        result[4] += sign * distance / (size - 1)
+        result[5] += sign * mobility
+    return result
+
+def self_play(games, size=MIN_SIZE, depth=2, randomness=0.1, max_plies=100,
+              seed=None, progress=None):
+    """Play games and label the positions in them.
+
+    Each move is random with probability `randomness`, and otherwise
+    chosen by a search of the given depth. Positions are reduced to
+    their canonical form; a position seen more than once is labelled
+    with its average result. Return a list of ``(board, player)`` pairs
+    and an array of labels: 1 if the player to move went on to win, -1
+    if they lost, and 0 for a draw.
+
+    """
+    rng = random.Random(seed)
+    searcher = Searcher()
+    seen = {}
+    for game in range(games):
+        board = Board(size, large=True)
+        player = PLAYERS[game % 2]
+        history = []
+        winner = None
+        for _ in range(max_plies):
+            key, _ = canonical_key(board, player)
+            if key not in seen:
+                seen[key] = [canonical(board, player)[:2], 0, 0]
+            history.append((key, player))
+            moves = board.valid_moves(player)
+            if not moves:
+                break
+            if rng.random() < randomness:
+                move = rng.choice(moves)
+            else:
+                move = searcher.search(board, player, depth).move
+            winner = board.move(player, *move)
+            if winner is not None:
+                break
+            player = other(player)
+
+        for key, mover in history:
+            entry = seen[key]
+            if winner is not None:
+                entry[1] += 1 if winner == mover else -1
+            entry[2] += 1
+        if progress is not None:
+            progress(game + 1)
+
+    positions = [entry[0] for entry in seen.values()]
+    labels = np.array([total / count for _, total, count in seen.values()])
+    return positions, labels
+
+def fit(x, labels, method='logistic', iterations=20, ridge=1e-3):
+    """Find weights that predict the labels from the features.
+
+    With ``method='least_squares'``, fit the labels directly. With
+    ``method='logistic'``, treat (label + 1) / 2 as the probability of
+    winning and fit its log-odds by Newton's method.
+
+    """
+    regulariser = ridge * np.eye(x.shape[1])
+    if method == 'least_squares':
+        return np.linalg.solve(x.T @ x + regulariser, x.T @ labels)
+    elif method == 'logistic':
+        target = (labels + 1) / 2
+        weights = np.zeros(x.shape[1])
+        for _ in range(iterations):
+            p = 1 / (1 + np.exp(-(x @ weights)))
+            gradient = x.T @ (p - target) + ridge * weights
+            hessian = (x * (p * (1 - p))[:, None]).T @ x + regulariser
+            step = np.linalg.solve(hessian, gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        return weights
+    else:
+        raise ValueError('unknown method: {0}'.format(method))
+
+class Evaluator:
+    """An evaluation function with learned weights.
+
+    Call it like `search.evaluate`, or use `evaluate_batch` to score many
+    positions at once.
+
+    """
+
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=float)
+        # Plain floats, for scoring one position at a time
+        self._weights = self.weights.tolist()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as infile:
+            data = json.load(infile)
+        if list(data['features']) != list(FEATURES):
+            raise ValueError('weights are for different features: {0}'.format(path))
+        return cls(data['weights'])
+
+    def save(self, path):
+        with open(path, 'w') as outfile:
+            json.dump({'features': FEATURES, 'weights': self.weights.tolist()},
+                      outfile, indent=4)
+
+    def evaluate_batch(self, grids, last):
+        """Score a batch of encoded positions. Return an array of
+        integer scores."""
+        scores = np.rint(SCALE * (features(grids, last) @ self.weights))
+        return np.clip(scores, -LIMIT, LIMIT).astype(int)
+
+    def __call__(self, board, player):
+        total = sum(value * weight for value, weight
+                    in zip(position_features(board, player), self._weights))
+        return max(-LIMIT, min(LIMIT, round(SCALE * total)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train an evaluation function')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    generate_parser = commands.add_parser('generate', help='generate positions by self-play')
+    generate_parser.add_argument('output')
+    generate_parser.add_argument('--games', type=int, default=100)
+    generate_parser.add_argument('--size', type=int, default=MIN_SIZE)
+    generate_parser.add_argument('--depth', type=int, default=2)
+    generate_parser.add_argument('--randomness', type=float, default=0.1)
+    generate_parser.add_argument('--seed', type=int, default=None)
+
+    fit_parser = commands.add_parser('fit', help='fit weights to positions')
+    fit_parser.add_argument('data')
+    fit_parser.add_argument('output')
+    fit_parser.add_argument('--method', choices=['logistic', 'least_squares'],
+                            default='logistic')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        def progress(count):
+            print('\r{0} games'.format(count), end='', file=sys.stderr)
+        positions, labels = self_play(args.games, args.size, args.depth,
+                                      args.randomness, seed=args.seed,
+                                      progress=progress)
+        print(file=sys.stderr)
+        grids, last = encode(positions)
+        np.savez_compressed(args.output, grids=grids, last=last, labels=labels)
+        print('{0} positions'.format(len(labels)))
+    else:
+        data = np.load(args.data)
+        x = features(data['grids'], data['last'])
+        weights = fit(x, data['labels'], args.method)
+        Evaluator(weights).save(args.output)
+        for name, weight in zip(FEATURES, weights):
+            print('{0:>10} {1:+.4f}'.format(name, weight))
+
+if __name__ == '__main__':
+    main()